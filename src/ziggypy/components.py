@@ -1,16 +1,117 @@
 import numpy as np
 
-from .varint import encode_varint
-from .util import batched
+from .varint import encode_varint_array, varint_lengths
 
 from abc import ABC, abstractmethod
-from typing import Tuple, Optional, Iterable, Any, Sequence
+from typing import Tuple, Optional, Iterable, Any, Sequence, List
 from io import RawIOBase
-from struct import pack
-from itertools import islice
+from struct import Struct
+from itertools import islice, chain
 
 BLOCKSIZE = 16
 
+# number of sets encoded at once by Set, a multiple of BLOCKSIZE
+_SET_CHUNK = 1 << 16
+
+_INT64 = Struct('<q')
+
+# flag, type, mode, name, offset, size, param1, param2
+_BOM_ENTRY = Struct('<BBB13sqqqq')
+
+
+def _pairs_from_arrays(keys: Any, values: Any, n: int) -> np.ndarray:
+    """Interleaves n keys and n values into an (n, 2) uint64 array of pairs."""
+
+    pairs = np.empty((n, 2), dtype=np.uint64)
+    pairs[:,0] = np.asarray(keys)
+    pairs[:,1] = np.asarray(values)
+    return pairs
+
+
+def _flatten(seqs: Iterable[Sequence[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenates sequences of ints into one array, returns it and the N+1 offsets of the sequences."""
+
+    seqs = list(seqs)
+    counts = np.fromiter((len(s) for s in seqs), dtype=np.int64, count=len(seqs))
+    items = np.fromiter(chain.from_iterable(seqs), dtype=np.int64, count=counts.sum())
+    return items, np.concatenate(([0], np.cumsum(counts)))
+
+
+def _pad_blocks(items: Iterable[Any], n: int, d: int) -> np.ndarray:
+    """Copies n d-dimensional items into full blocks, the last block is padded with -1."""
+
+    m = (n + BLOCKSIZE - 1) // BLOCKSIZE
+    padded = np.full((m * BLOCKSIZE, d), -1, dtype=np.int64)
+    padded[:n] = np.asarray(items, dtype=np.int64).reshape(n, d)
+    return padded
+
+
+def _encode_blocks(values: np.ndarray, d: int) -> List[Any]:
+    """
+    VarInt encodes full blocks of d-dimensional values, column-major within
+    each block as required by the spec. Returns the sync vector of block
+    offsets and the encoded blocks as the parts of the component.
+    """
+
+    m = len(values) // BLOCKSIZE
+    start = m*8
+
+    # VarInt encode all blocks at once
+    blocks = values.reshape(m, BLOCKSIZE, d).transpose(0, 2, 1)
+    encoded, lengths = encode_varint_array(blocks, return_lengths=True)
+    block_lens = lengths.reshape(m, BLOCKSIZE * d).sum(axis=1)
+
+    # sync offsets point right at the blocks within the component
+    sync = np.empty(m, dtype='<i8')
+    sync[:1] = start
+    sync[1:] = start + np.cumsum(block_lens[:-1])
+
+    return [sync.tobytes(), encoded]
+
+
+def _encode_set_blocks(items: np.ndarray, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    VarInt encodes sets in blocks of 16 as required by the spec. The sets are
+    given by their items in one flat array and N+1 offsets into it. Returns
+    the encoded blocks and the length in bytes of each block.
+    """
+
+    n_sets = len(offsets) - 1
+    m = (n_sets + BLOCKSIZE - 1) // BLOCKSIZE # number of blocks
+    set_starts = offsets[:-1]
+    nonempty = set_starts[offsets[1:] > set_starts]
+
+    # delta encode each set, the first item stays absolute
+    items_delta = np.diff(items, prepend=0)
+    items_delta[nonempty] = items[nonempty]
+
+    # encoded size of each set and its offset relative to the first set of
+    # its block, padded to full blocks of 16 sets with an offset of -1 and a
+    # size of 0
+    item_ends = np.concatenate(([0], np.cumsum(varint_lengths(items_delta))))
+    set_lens = np.zeros(m * BLOCKSIZE, dtype=np.int64)
+    set_lens[:n_sets] = item_ends[offsets[1:]] - item_ends[set_starts]
+    set_lens = set_lens.reshape(m, BLOCKSIZE)
+    set_offsets = np.cumsum(set_lens, axis=1) - set_lens
+    set_offsets.reshape(-1)[n_sets:] = -1
+
+    # every block consists of the delta compressed offsets of its sets, their
+    # sizes and the items of its sets, laid out for all blocks in one stream
+    # and encoded at once
+    header_starts = 2 * BLOCKSIZE * np.arange(m) + offsets[:-1:BLOCKSIZE]
+    header_slots = header_starts[:,None] + np.arange(2 * BLOCKSIZE)
+    stream = np.empty(m * 2 * BLOCKSIZE + len(items), dtype=np.int64)
+    stream[header_slots[:,:BLOCKSIZE]] = np.diff(set_offsets, axis=1, prepend=0)
+    stream[header_slots[:,BLOCKSIZE:]] = set_lens
+    is_item = np.ones(len(stream), dtype=bool)
+    is_item[header_slots] = False
+    stream[is_item] = items_delta
+    del items_delta, set_lens, set_offsets, header_slots, is_item
+
+    encoded, lengths = encode_varint_array(stream, return_lengths=True)
+    return encoded, np.add.reduceat(lengths, header_starts)
+
+
 class Component(ABC):
     """Abstract base class for Ziggurat data components."""
 
@@ -56,20 +157,21 @@ class Component(ABC):
         name = self.name.encode('ascii')
         assert len(name) <= 12
 
-        f.write(pack('B', 1))
-        f.write(pack('B', self.component_type))
-        f.write(pack('B', self.mode))
-        f.write(name.ljust(13, b'\0'))
-        f.write(pack('<q', offset))
-        f.write(pack('<q', size))
-        f.write(pack('<q', self.params[0] if self.params[0] else 0))
-        f.write(pack('<q', self.params[1] if self.params[1] else 0))
+        f.write(_BOM_ENTRY.pack(
+            1,
+            self.component_type,
+            self.mode,
+            name,
+            offset,
+            size,
+            self.params[0] if self.params[0] else 0,
+            self.params[1] if self.params[1] else 0,
+        ))
 
 
-    @abstractmethod
     def bytelen(self) -> int:
         """Returns the length of the componen int bytes."""
-        pass
+        return self._bytelen
 
 
     @abstractmethod
@@ -96,19 +198,15 @@ class Vector(Component):
         )
         self.n = n
         self.d = d
-        self.data = np.atleast_2d(np.array(items, dtype=np.int64))
-        self.data.shape = (d, n)
+        # kept row-major and little endian, i.e. in file order; int64 arrays
+        # are not copied, so the caller must not modify items afterwards
+        self.data = np.ascontiguousarray(items, dtype='<i8').reshape(n, d)
 
-    
-    def bytelen(self):
-        return self.n * self.d * 8 
+        self._bytelen = self.n * self.d * 8
 
-    
-    def write(self, f):
 
-        for i in range(self.n):
-            for j in range(self.d):
-                f.write(pack('<q', self.data[j][i]))
+    def write(self, f):
+        f.write(self.data) # contiguous array, written without a bytes copy
 
 
 class VectorComp(Component):
@@ -122,55 +220,15 @@ class VectorComp(Component):
         )        
         self.n = n
         self.d = d
-        data = np.atleast_2d(np.array(items, dtype=np.int64))
-        data.shape = (n, d)
 
         # compress data
+        self.parts = _encode_blocks(_pad_blocks(items, n, d), d)
 
-        m = int((n - 1) / BLOCKSIZE) + 1
-        comp_start = m*8
-
-        # VarInt encoded blocks
-        blocks = []
-
-        for i in range(0, n, BLOCKSIZE):
-            remaining = data.shape[0] - i
-            if remaining >= 16:
-                block = data[i : i+BLOCKSIZE]
-            else:
-                block = np.full((16, d), -1, dtype=np.int64)
-                block[:remaining] = data[i:]
-            
-            cols = []
-
-            for j in range(d):
-                row = block[:, j]
-                varints = []
-                for l in row:
-                    varints.append(encode_varint(l))
-                cols.append(b''.join(varints))
-
-            blocks.append(b''.join(cols))
-
-        assert len(blocks) == m
-
-        # Sync offsets
-        sync = [comp_start]
-        for i, b in enumerate(blocks[:-1], start=1):
-            sync.append(sync[i-1] + len(b))
-        
-        assert len(sync) == m
-
-        self.encoded = b''.join(pack('<q', s) for s in sync) +\
-            b''.join(blocks)
-
+        self._bytelen = sum(len(p) for p in self.parts)
 
-    def bytelen(self):
-        return len(self.encoded)
 
-    
     def write(self, f):
-        f.write(self.encoded)          
+        f.writelines(self.parts)
 
 
 class VectorDelta(Component):
@@ -184,63 +242,28 @@ class VectorDelta(Component):
         )
         self.n = n
         self.d = d
-        data = np.atleast_2d(np.array(items, dtype=np.int64))
-        data.shape = (n, d)
 
-        self.data = data # TODO entfernen
         # compress data
 
-        m = int((n - 1) / BLOCKSIZE) + 1
-        delta_start = m*8
-
-        # VarInt encoded blocks
-        blocks = []
-
-        for i in range(0, n, BLOCKSIZE):
-            remaining = data.shape[0] - i
-            if remaining >= 16:
-                block = data[i : i+BLOCKSIZE]
-            else:
-                block = np.full((16, d), -1, dtype=np.int64)
-                block[:remaining] = data[i:]
-            
-            delta = np.empty(block.shape, dtype=np.int64)
-            delta[0] = np.copy(block[0])
+        # delta encode everything in one go, each block starts with an
+        # absolute value
+        padded = _pad_blocks(items, n, d)
+        deltas = np.empty_like(padded)
+        deltas[0] = padded[0]
+        deltas[1:] = np.diff(padded, axis=0)
+        deltas[::BLOCKSIZE] = padded[::BLOCKSIZE]
+        del padded # a copy of items, not needed while encoding
 
-            cols = []
+        # byte-shuffling the deltas of d > 1 vectors before VarInt encoding
+        # would compress better, but needs a new component mode that readers
+        # understand and is therefore left as a possible format extension
+        self.parts = _encode_blocks(deltas, d)
 
-            for j in range(d):
-                for i in range(1, len(block)):
-                    delta[i][j] = block[i][j] - block[i-1][j]
-
-                row = delta[:, j]
-                varints = []
-                for l in row:
-                    varints.append(encode_varint(l))
-
-                cols.append(b''.join(varints))
-
-            blocks.append(b''.join(cols))
-
-        assert len(blocks) == m
-
-        # Sync offsets
-        sync = [delta_start]
-        for i, b in enumerate(blocks[:-1], start=1):
-            sync.append(sync[i-1] + len(b))
-
-        assert len(sync) == m
-
-        self.encoded = b''.join(pack('<q', s) for s in sync) +\
-            b''.join(blocks)
-
-    
-    def bytelen(self):
-        return len(self.encoded)
+        self._bytelen = sum(len(p) for p in self.parts)
 
 
     def write(self, f):
-        f.write(self.encoded)
+        f.writelines(self.parts)
 
 
 class StringList(Component):
@@ -248,12 +271,9 @@ class StringList(Component):
     def __init__(self, strings: Iterable[bytes], name: str, n: int):
         """strings: series of utf-8 encoded null terminated strings"""
 
-        self.encoded = bytearray()
+        # trailing empty string terminates the last string
+        self.encoded = b'\0'.join(list(islice(strings, n)) + [b''])
 
-        for s in islice(strings, n):
-            self.encoded.extend(s)
-            self.encoded.extend(b'\0')
-        
         super().__init__(
             0x02,
             0x00,
@@ -261,9 +281,7 @@ class StringList(Component):
             (n, 0)
         )
 
-
-    def bytelen(self):
-        return len(self.encoded)
+        self._bytelen = len(self.encoded)
 
 
     def write(self, f):
@@ -292,19 +310,21 @@ class StringVector(Component):
             (n, 0)
         )
 
-
-    def bytelen(self):
-        return len(self.offsets)*8 + len(self.encoded)
+        self._bytelen = len(self.offsets)*8 + len(self.encoded)
 
 
     def write(self, f):
-        f.write(b''.join(pack('<q', o) for o in self.offsets))
+        f.write(np.asarray(self.offsets, dtype='<i8'))
         f.write(self.encoded)
 
 
 class Set(Component):
 
-    def __init__(self, sets: Iterable[Sequence[int]], name: str, n: int):
+    def __init__(self, sets: Iterable[Sequence[int]], name: str, n: int, offsets: Optional[Any] = None):
+        """
+        sets: sequence of ascending sets of ints, or the items of all sets
+        concatenated if offsets is given, see from_arrays
+        """
 
         super().__init__(
             0x05,
@@ -313,67 +333,53 @@ class Set(Component):
             (n, 2)
         )
 
-        blocks = []
-
-        # group sets into blocks of 16
-        for batch in batched(sets, 16):
-            offsets = []
-            lengths = []
-            encoded_items = b""
-
-            # delta encode each set
-            itemoffset = 0
-            for set in batch:
-                set = list(set)
-                delta = [set[0]]
-                for i in range(1, len(set)):
-                    delta.append(set[i] - set[i-1])
-                
-                encoded = b"".join(encode_varint(n) for n in delta)
-                
-                offsets.append(itemoffset)
-                lengths.append(len(encoded))
-                encoded_items += encoded
-
-                itemoffset += len(encoded)
-
-            # pad arrays
-            if len(offsets) < 16:
-                padding = 16 - len(offsets)
-                offsets.extend([-1] * padding)
-                lengths.extend([0] * padding)
-
-            # delta compress offset array
-
-            offsets_delta = [offsets[0]]
-            for i in range(1, len(offsets)):
-                offsets_delta.append(offsets[i] - offsets[i-1])
-
-            # assemble block
-            block = b"".join(encode_varint(o) for o in offsets_delta)
-            block += b"".join(encode_varint(l) for l in lengths)
-            block += encoded_items
-
-            blocks.append(block)
-        
+        if offsets is None:
+            items, offsets = _flatten(sets)
+        else:
+            items = np.asarray(sets, dtype=np.int64)
+            offsets = np.asarray(offsets, dtype=np.int64)
+
+        # sets are encoded a chunk of blocks at a time, which bounds the
+        # memory used by temporaries for large numbers of sets
+        parts = []
+        block_lens = []
+        for start in range(0, len(offsets) - 1, _SET_CHUNK):
+            chunk = offsets[start : start + _SET_CHUNK + 1]
+            encoded, lens = _encode_set_blocks(items[chunk[0] : chunk[-1]], chunk - chunk[0])
+            parts.append(encoded)
+            block_lens.append(lens)
+
         # synchronisation vector with offsets for each block
-        sync = [0]
-        for i, b in enumerate(blocks[:-1], start=1):
-            sync.append(sync[i-1] + len(b))
+        block_lens = np.concatenate([[0]] + block_lens)
+        sync = np.cumsum(block_lens[:-1], dtype='<i8')
 
-        self.sync = sync
-        self.blocks = blocks        
+        # sync vector and blocks are written one after another, see write()
+        self.parts = [sync.tobytes()] + parts
+
+        self._bytelen = sum(len(p) for p in self.parts)
+
+
+    @classmethod
+    def from_arrays(cls, items: Any, offsets: Any, name: str, n: int) -> 'Set':
+        """
+        Builds the set stream from the items of all sets in one flat array
+        instead of a sequence of sets, which avoids a Python object per item.
+
+        Parameters
+        ----------
+        items : array_like
+            The items of all sets concatenated, each set in ascending order.
+        offsets : array_like
+            N+1 offsets into items, set i is items[offsets[i]:offsets[i+1]].
+        name : str
+        n : int
+        """
+
+        return cls(items, name, n, offsets)
 
-    
-    def bytelen(self):
-        return len(self.sync)*8 + sum(len(b) for b in self.blocks)
 
-    
     def write(self, f):
-        for o in self.sync:
-            f.write(pack('<q', o))
-        for b in self.blocks:
-            f.write(b)
+        f.writelines(self.parts)
 
 
 class Index(Component):
@@ -387,21 +393,38 @@ class Index(Component):
             (n, 2)
         )
         
-        self.data = np.array(pairs, dtype=np.uint64)
-        self.data.shape = (n, 2)
+        # no copy for uint64 arrays, the caller must not modify pairs afterwards
+        self.data = np.ascontiguousarray(pairs, dtype='<u8').reshape(n, 2)
 
         if not sorted:
-            self.data = self.data[self.data[:,1].argsort()]
-            self.data = self.data[self.data[:,0].argsort(kind='mergesort')]
+            self.data = self.data[np.lexsort((self.data[:,1], self.data[:,0]))]
 
+        self._bytelen = len(self.data) * 2 * 8
 
-    def bytelen(self):
-        return len(self.data) * 2 * 8
+
+    @classmethod
+    def from_arrays(cls, keys: Any, values: Any, name: str, n: int, sorted=False) -> 'Index':
+        """
+        Builds the index from separate key and value arrays instead of a
+        sequence of pairs, which avoids creating a Python tuple per item.
+
+        Parameters
+        ----------
+        keys : array_like
+            The n keys, cast to uint64.
+        values : array_like
+            The n values (e.g. corpus positions), cast to uint64.
+        name : str
+        n : int
+        sorted : bool = False
+            Whether the pairs are already sorted by key and value.
+        """
+
+        return cls(_pairs_from_arrays(keys, values, n), name, n, sorted)
 
 
     def write(self, f):
-        for i in self.data.flat:
-            f.write(pack('<Q', i))
+        f.write(self.data) # contiguous array, written without a bytes copy
 
 
 class IndexCompressed(Component):
@@ -415,104 +438,110 @@ class IndexCompressed(Component):
             (n, 2)
         )
 
-        data = np.array(pairs, dtype=np.uint64)
-        data.shape = (n, 2)
+        data = np.asarray(pairs, dtype=np.uint64).reshape(n, 2)
 
         if not sorted:
-            data = data[data[:,1].argsort()]
-            data = data[data[:,0].argsort(kind='mergesort')]
+            data = data[np.lexsort((data[:,1], data[:,0]))]
+
+        # a block holds BLOCKSIZE items and is extended by overflow items as
+        # long as they share the key of the last item, so a new block starts
+        # at the first key change at least BLOCKSIZE items after the previous
+        # block start
+        keys = data[:,0]
+        changes = np.append(np.flatnonzero(keys[1:] != keys[:-1]) + 1, len(data))
+
+        starts = [0]
+        while starts[-1] + BLOCKSIZE < len(data):
+            starts.append(int(changes[np.searchsorted(changes, starts[-1] + BLOCKSIZE)]))
+        if starts[-1] == len(data):
+            starts.pop()
+
+        ends = starts[1:] + [len(data)]
+        blocks = list(zip(starts, ends))
 
-        blocks = []
-        blen = 0
-        bstart = 0
         block_padding = 0
+        if ends[-1] - starts[-1] < BLOCKSIZE: # padding to a full block
+            block_padding = BLOCKSIZE - (ends[-1] - starts[-1])
+            padding = np.full((block_padding, 2), np.iinfo(np.uint64).max, dtype=np.uint64)
+            data = np.concatenate((data, padding))
+            blocks[-1] = (starts[-1], starts[-1] + BLOCKSIZE)
+
 
-        for i in range(len(data)):
-            if blen < 16:
-                blen += 1
-            else:
-                if data[i][0] == data[i-1][0]:
-                    blen += 1
-                else:
-                    blocks.append(data[bstart:i])
-                    bstart = i
-                    blen = 1
-        if blen != 0:
-            if blen < 16: # padding to a full block
-                block_padding = 16 - blen
-                block = np.full((16, 2), -1, dtype=np.uint64)
-                block[:blen] = data[bstart:]
-                blocks.append(block)
-            else:
-                blocks.append(data[bstart:])
-
-
-        r = len(blocks) * 16 - block_padding   # number of regular items in blocks
-        o = len(data) - r                      # number of overflow items
-        mr = int((r - 1) / 16) + 1             # number of sync blocks
-        data_offset = mr*8+8                   # start offset of data in compontent
+        r = len(blocks) * BLOCKSIZE - block_padding # number of regular items in blocks
+        o = n - r                                   # number of overflow items
+        mr = (r + BLOCKSIZE - 1) // BLOCKSIZE       # number of sync blocks
+        data_offset = mr*8+8                        # start offset of data in compontent
 
         assert mr == len(blocks)
     
         print(f'Compressed Index:')
-        print(f'\t{len(data)} total items')
+        print(f'\t{n} total items')
         print(f'\t{r} regular items, {o} overflow items')
         print(f'\t{len(blocks)} sync blocks')
 
-        packed_blocks = []
-        block_keys = []
+        # deltas for all items at once
+        # key deltas wrap around like int64 arithmetic on the reader side
+        keys_delta = np.diff(data[:,0]).view(np.int64)
+        positions_delta = np.diff(data[:,1].view(np.int64)) # cpos offsets can be negative
 
-        for b in blocks:
-            bo = encode_varint(len(b) - 16)
+        bounds = np.array(blocks, dtype=np.int64)
+        bstarts = bounds[:,0]
+        blens = bounds[:,1] - bstarts
 
-            keys = b[:16,0]
-            block_keys.append(keys[0])
-            keys_delta = []
-            for i in range(1, len(keys)):
-                keys_delta.append(keys[i] - keys[i-1])
-            
-            positions = b[:,1].astype(np.int64) # cpos offsets can be negative
-            positions_delta = []
-            for i in range(1, len(positions)):
-                positions_delta.append(positions[i] - positions[i-1])
+        # every packed block consists of its number of overflow items, the key
+        # deltas of its first BLOCKSIZE items and the position deltas of all
+        # its items, laid out for all blocks in one stream and encoded at once
+        packed_lens = blens + BLOCKSIZE - 1
+        packed_starts = np.cumsum(packed_lens) - packed_lens
+        stream = np.empty(packed_lens.sum(), dtype=np.int64)
 
-            packed = bo
-            packed += b''.join(encode_varint(int(x)) for x in keys_delta)
-            packed += b''.join(encode_varint(x) for x in positions_delta)
+        stream[packed_starts] = blens - BLOCKSIZE
 
-            packed_blocks.append(packed)
-        
-        assert mr == len(packed_blocks)
-        assert mr == len(block_keys)
+        key_slots = np.arange(1, BLOCKSIZE)
+        stream[packed_starts[:,None] + key_slots] = keys_delta[bstarts[:,None] + key_slots - 1]
 
-        offsets = [data_offset]
-        for i, b in enumerate(blocks[:-1], start=1):
-            offsets.append(offsets[i-1] + len(b))
+        item_blocks = np.repeat(np.arange(mr), blens)
+        items = np.flatnonzero(np.arange(len(data)) != bstarts[item_blocks])
+        item_blocks = item_blocks[items]
+        stream[packed_starts[item_blocks] + BLOCKSIZE - 1 + items - bstarts[item_blocks]] = positions_delta[items - 1]
 
-        assert len(offsets) == mr and len(offsets) == len(block_keys)
+        packed_blocks = encode_varint_array(stream)
 
-        sync = []
-        for k, o in zip(block_keys, offsets):
-            sync.append(pack('<Q', k))
-            sync.append(pack('<q', o))
+        # sync vector of (first key, offset) pairs for each block
+        sync = np.empty(mr, dtype=[('key', '<u8'), ('offset', '<i8')])
+        sync['key'] = data[bstarts, 0]
+        sync['offset'][0] = data_offset
+        sync['offset'][1:] = data_offset + np.cumsum(blens[:-1])
 
-        self.encoded = pack('<q', r)
-        self.encoded += b''.join(sync)
-        self.encoded += b''.join(packed_blocks)
+        # header and blocks are written one after another, see write()
+        header = _INT64.pack(r) + sync.tobytes()
+        self.parts = [header, packed_blocks]
 
+        self._bytelen = sum(len(p) for p in self.parts)
 
-    def bytelen(self):
-        return len(self.encoded)
+
+    @classmethod
+    def from_arrays(cls, keys: Any, values: Any, name: str, n: int, sorted=False) -> 'IndexCompressed':
+        """
+        Builds the index from separate key and value arrays, see
+        Index.from_arrays.
+        """
+
+        return cls(_pairs_from_arrays(keys, values, n), name, n, sorted)
 
 
     def write(self, f):
-        f.write(self.encoded)
+        f.writelines(self.parts)
 
 
 class InvertedIndex(Component):
 
-    def __init__(self, types: Sequence[Any], positions: Iterable[Iterable[int]], name: str, k: int, p: int):
-        """positions: sequence of lists of lexicon positions for each corpus position"""
+    def __init__(self, types: Sequence[Any], positions: Iterable[Iterable[int]], name: str, k: int, p: int, offsets: Optional[Any] = None):
+        """
+        positions: sequence of lists of lexicon positions for each corpus
+        position, or the lexicon positions of all corpus positions
+        concatenated if offsets is given, see from_arrays
+        """
 
         assert p == 0, "jump tables for inverted index are not implemented yet"
 
@@ -523,39 +552,72 @@ class InvertedIndex(Component):
             (k, p)
         )
 
-        postings = [[] for _ in types]
-        for i, occurences in enumerate(positions):
-            for t in occurences:
-                postings[t].append(i)
-
-        postings_delta = [[] for _ in types]
-        for j in range(len(postings)):
-            postings_delta[j].append(postings[j][0])
-            for i in range(1, len(postings[j])):
-                postings_delta[j].append(postings[j][i] - postings[j][i-1])
-
-        postings_encoded = []
-        for pd in postings_delta:
-            block = encode_varint(0) # jump table offset for now always zero TODO
-            for d in pd:
-                block += encode_varint(d)
-            
-            postings_encoded.append(block)
-
-        self.encoded = b''
-
-        offset = k * 16
-        for t, e in zip(postings, postings_encoded):
-            self.encoded += pack('<q', len(t)) # type frequency
-            self.encoded += pack('<q', offset) # offset for postings list
-            offset += len(e)
-
-        self.encoded += b''.join(postings_encoded)
+        # flat (type, corpus position) pairs
+        if offsets is not None:
+            occurences = np.asarray(positions, dtype=np.int64)
+            counts = np.diff(np.asarray(offsets, dtype=np.int64))
+            cpos = np.repeat(np.arange(len(counts)), counts)
+        elif isinstance(positions, np.ndarray) and positions.ndim == 1:
+            # exactly one type per corpus position
+            occurences = positions.astype(np.int64, copy=False)
+            cpos = np.arange(len(occurences))
+        elif isinstance(positions, np.ndarray) and positions.ndim == 2:
+            # the same number of types for every corpus position
+            occurences = positions.reshape(-1).astype(np.int64, copy=False)
+            cpos = np.repeat(np.arange(positions.shape[0]), positions.shape[1])
+        else:
+            occurences, offsets = _flatten(positions)
+            cpos = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+        # a stable sort by type groups the postings and keeps them ascending
+        postings = cpos[np.argsort(occurences, kind='stable')]
+        type_freqs = np.bincount(occurences, minlength=len(types))
+        type_starts = np.cumsum(type_freqs) - type_freqs
+
+        # delta encode each postings list, the first posting stays absolute
+        postings_delta = np.diff(postings, prepend=0)
+        postings_delta[type_starts[type_freqs > 0]] = postings[type_starts[type_freqs > 0]]
+
+        # every postings list is preceded by its jump table offset, for now
+        # always zero TODO
+        stream = np.insert(postings_delta, type_starts, 0)
+        encoded, lengths = encode_varint_array(stream, return_lengths=True)
+        postings_lens = np.add.reduceat(lengths, type_starts + np.arange(len(types)))
+
+        # header of (type frequency, offset of postings list) pairs
+        header = np.empty((len(types), 2), dtype='<i8')
+        header[:,0] = type_freqs
+        header[:,1] = k * 16 + np.cumsum(postings_lens) - postings_lens
+
+        # the postings lists are stored back to back, so the encoded stream is
+        # written as a whole after the header, see write()
+        self.parts = [header.tobytes(), encoded]
+
+        self._bytelen = sum(len(p) for p in self.parts)
+
+
+    @classmethod
+    def from_arrays(cls, types: Sequence[Any], items: Any, offsets: Any, name: str, k: int, p: int) -> 'InvertedIndex':
+        """
+        Builds the inverted index from the types of all corpus positions in
+        one flat array instead of a sequence of lists, which avoids a Python
+        object per item.
 
+        Parameters
+        ----------
+        types : Sequence[Any]
+        items : array_like
+            The lexicon positions of all corpus positions concatenated.
+        offsets : array_like
+            N+1 offsets into items, corpus position i has the lexicon
+            positions items[offsets[i]:offsets[i+1]].
+        name : str
+        k : int
+        p : int
+        """
 
-    def bytelen(self):
-        return len(self.encoded)
+        return cls(types, items, name, k, p, offsets)
 
 
     def write(self, f):
-        f.write(self.encoded)
+        f.writelines(self.parts)
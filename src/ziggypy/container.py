@@ -2,14 +2,19 @@ from .components import Component
 
 from typing import Tuple, Optional
 from collections.abc import Sequence
-from io import RawIOBase
+from io import RawIOBase, BufferedWriter
 from uuid import UUID
-from struct import pack
+from struct import Struct
+from itertools import accumulate
 
 
 BOM_START: int = 160
 LEN_BOM_ENTRY: int = 48
 
+# magic, version, container type, LF, uuid, LF EOT 0 0, allocated, used,
+# padding, dim1, dim2, base1_uuid + padding, base2_uuid + padding
+_HEADER = Struct('<8s4s3s1s36s4sBB6xqq40s40s')
+
 
 def data_start(cn: int) -> int:
     """
@@ -42,11 +47,8 @@ def align_offset(o: int) -> int:
     int
         o + necessary padding 
     """
-    
-    if o % 8 > 0:
-        return o + (8 - (o % 8))
-    else:
-        return o
+
+    return (o + 7) & ~7
 
 
 class Container():
@@ -93,56 +95,45 @@ class Container():
             A raw binary IO stream(-like object).
         """
 
-        # consts
-        f.write('Ziggurat'.encode('ascii')) # magic
-        f.write('1.0\t'.encode('ascii')) # version
-        f.write(self.container_type[0].encode('ascii')) # container family
-        f.write(self.container_type[1].encode('ascii')) # container class
-        f.write(self.container_type[2].encode('ascii')) # container type
-        f.write('\n'.encode('ascii')) # LF
-
-        f.write(str(self.uuid).encode('ascii')) # uuid as ASCII (36 bytes)
-        f.write('\n\x04\0\0'.encode('ascii')) # LF EOT 0 0
-
-        # components meta
-        f.write(pack('B', len(self.components))) #allocated
-        f.write(pack('B', len(self.components))) #used
-
-        f.write(bytes(6)) # padding
-
-        # dimensions
-        f.write(pack('<q', self.dimensions[0])) # dim1
-        f.write(pack('<q', self.dimensions[1])) # dim2
-
-        # referenced base layers
-        if self.base_uuids[0]:
-            s = str(self.base_uuids[0]).encode('ascii')
-            assert len(s) == 36, "UUID must be 36 bytes long"
-            f.write(s)
-        else:
-            f.write(bytes(36)) # base1_uuid + padding
-        f.write(bytes(4)) # padding
-        
-        if self.base_uuids[1]:
-            s = str(self.base_uuids[1]).encode('ascii')
-            assert len(s) == 36, "UUID must be 36 bytes long"
-            f.write(s)
-        else:
-            f.write(bytes(36)) # base2_uuid + padding
-        f.write(bytes(4)) # padding
-
-        # file offsets
-        self.offsets = [data_start(len(self.components))]
-        for i, c in enumerate(self.components[:-1], start=1):
-            self.offsets.append(align_offset(self.offsets[i-1] + c.bytelen()))
+        base_uuids = []
+        for base_uuid in self.base_uuids:
+            if base_uuid:
+                s = str(base_uuid).encode('ascii')
+                assert len(s) == 36, "UUID must be 36 bytes long"
+                base_uuids.append(s)
+            else:
+                base_uuids.append(b'')
+
+        f.write(_HEADER.pack(
+            'Ziggurat'.encode('ascii'), # magic
+            '1.0\t'.encode('ascii'), # version
+            self.container_type.encode('ascii'), # container family, class and type
+            '\n'.encode('ascii'), # LF
+            str(self.uuid).encode('ascii'), # uuid as ASCII (36 bytes)
+            '\n\x04\0\0'.encode('ascii'), # LF EOT 0 0
+            len(self.components), # allocated
+            len(self.components), # used
+            self.dimensions[0], # dim1
+            self.dimensions[1], # dim2
+            base_uuids[0], # base1_uuid + padding
+            base_uuids[1], # base2_uuid + padding
+        ))
+
+        # file offsets, data_start is 8-byte aligned so padding each size keeps
+        # every following offset aligned
+        sizes = [c.bytelen() for c in self.components]
+        self.offsets = list(accumulate(
+            (align_offset(s) for s in sizes[:-1]),
+            initial=data_start(len(self.components))
+        ))
 
         print(f'offset table for container {self.uuid}:')
-        for i, (o, c) in enumerate(zip(self.offsets, self.components)):
-            print(f'\tcomponent {i+1} "{c.name}"\t{hex(o)}\tlen({c.bytelen()})')
+        for i, (o, c, s) in enumerate(zip(self.offsets, self.components, sizes)):
+            print(f'\tcomponent {i+1} "{c.name}"\t{hex(o)}\tlen({s})')
 
         # write BOM entries
-        for c, o in zip(self.components, self.offsets):
-            c.write_bom(f, o, c.bytelen())
+        for c, o, s in zip(self.components, self.offsets, sizes):
+            c.write_bom(f, o, s)
 
 
     def write(self, f: RawIOBase) -> None:
@@ -157,9 +148,25 @@ class Container():
         See Also
         --------
         write_header : Writes only the file header, used by this method.
+
+        Notes
+        -----
+        Unbuffered raw streams are wrapped in a BufferedWriter for the duration
+        of the call to coalesce the many small writes. The stream is flushed
+        and detached from the wrapper again afterwards, it stays open and
+        remains owned by the caller.
         """
 
-        self.write_header(f)
-        for component, offset in zip(self.components, self.offsets):
-            f.write(bytes(offset - f.tell())) # extra padding for alignment
-            component.write(f)
+        raw = isinstance(f, RawIOBase)
+        if raw:
+            f = BufferedWriter(f, buffer_size=1<<20)
+
+        try:
+            self.write_header(f)
+            for component, offset in zip(self.components, self.offsets):
+                f.write(bytes(offset - f.tell())) # extra padding for alignment
+                component.write(f)
+        finally:
+            if raw:
+                f.flush()
+                f.detach()
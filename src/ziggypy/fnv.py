@@ -0,0 +1,69 @@
+import numpy as np
+
+from typing import Sequence
+
+FNV1A_64_OFFSET = np.uint64(0xcbf29ce484222325)
+FNV1A_64_PRIME = np.uint64(0x100000001b3)
+
+
+def fnv1a_64_bulk(buf: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Computes the 64 bit FNV-1a hashes of many strings at once.
+
+    The strings are hashed side by side, one byte position per step, so the
+    number of NumPy passes is the length of the longest string rather than
+    the number of strings.
+
+    Parameters
+    ----------
+    buf : np.ndarray
+        All strings concatenated as a flat uint8 array.
+    offsets : np.ndarray
+        N+1 offsets into buf, string i is buf[offsets[i]:offsets[i+1]].
+
+    Returns
+    -------
+    np.ndarray
+        The N hashes as a uint64 array.
+    """
+
+    offsets = np.asarray(offsets, dtype=np.int64)
+    starts = offsets[:-1]
+    lengths = np.diff(offsets)
+
+    # longest strings first, so the strings still being hashed at each byte
+    # position are always a prefix
+    order = np.argsort(lengths, kind='stable')[::-1]
+    starts = starts[order]
+    max_len = int(lengths.max()) if len(lengths) else 0
+    active = len(lengths) - np.cumsum(np.bincount(lengths, minlength=max_len))
+
+    h = np.full(len(lengths), FNV1A_64_OFFSET, dtype=np.uint64)
+    for i in range(max_len):
+        k = active[i]
+        h[:k] ^= buf[starts[:k] + i]
+        h[:k] *= FNV1A_64_PRIME
+
+    hashes = np.empty_like(h)
+    hashes[order] = h
+    return hashes
+
+
+def fnv1a_64_strings(strings: Sequence[bytes]) -> np.ndarray:
+    """
+    Computes the 64 bit FNV-1a hashes of a sequence of strings.
+
+    Parameters
+    ----------
+    strings : Sequence[bytes]
+        The strings to hash.
+
+    Returns
+    -------
+    np.ndarray
+        The hashes as a uint64 array.
+    """
+
+    buf = np.frombuffer(b''.join(strings), dtype=np.uint8)
+    lengths = np.fromiter((len(s) for s in strings), dtype=np.int64, count=len(strings))
+    return fnv1a_64_bulk(buf, np.concatenate(([0], np.cumsum(lengths))))
@@ -45,8 +45,7 @@ class SegmentationLayer(Layer):
 
         p_vec = Vector(self.partition, "Partition", len(self.partition))
 
-        ranges = np.atleast_2d(np.array(ranges, dtype=np.int64))
-        ranges.shape = (n, 2)
+        ranges = np.asarray(ranges, dtype=np.int64).reshape(n, 2)
 
         range_stream = VectorDelta(ranges, "RangeStream", n, d = 2)
 
@@ -1,6 +1,5 @@
 from abc import ABC
 from io import RawIOBase
-from itertools import chain, accumulate
 from uuid import UUID, uuid4
 from collections import Counter
 
@@ -8,7 +7,7 @@ from .container import Container
 from .components import *
 from .layers import Layer
 
-from fnvhash import fnv1a_64
+from .fnv import fnv1a_64_bulk, fnv1a_64_strings
 
 class Variable(ABC):
 
@@ -27,6 +26,9 @@ class PlainStringVariable(Variable):
         
         super().__init__(base_layer, uuid if uuid else uuid4())
 
+        # strings are iterated more than once
+        strings = list(strings)
+
         # build StringData [string]
         print('Building StringData')
 
@@ -34,22 +36,24 @@ class PlainStringVariable(Variable):
 
         # build OffsetStream [offset_to_next_string]
         print('Building OffsetStream')
-        offset_stream = list(accumulate(chain([0], strings), lambda x, y: x + len(y)))
+        lengths = np.fromiter((len(s) for s in strings), dtype=np.int64, count=len(strings))
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
 
         if compressed:
-            offset_stream = VectorDelta(offset_stream, 'OffsetStream', len(offset_stream))
+            offset_stream = VectorDelta(offsets, 'OffsetStream', len(offsets))
         else:
-            offset_stream = Vector(offset_stream, 'OffsetStream', len(offset_stream))
+            offset_stream = Vector(offsets, 'OffsetStream', len(offsets))
 
 
         # build StringHash [(hash, cpos)]
         print('Building StringHash')
-        string_pairs = [(fnv1a_64(s), i) for i, s in enumerate(strings)]
+        hashes = fnv1a_64_bulk(np.frombuffer(b''.join(strings), dtype=np.uint8), offsets)
+        cpos = np.arange(len(strings))
 
         if compressed:
-            string_hash = IndexCompressed(string_pairs, "StringHash", base_layer.n)
+            string_hash = IndexCompressed.from_arrays(hashes, cpos, "StringHash", base_layer.n)
         else:
-            string_hash = Index(string_pairs, "StringHash", base_layer.n)
+            string_hash = Index.from_arrays(hashes, cpos, "StringHash", base_layer.n)
 
         self.container = Container((string_data, offset_stream, string_hash),
             'ZVc',
@@ -65,6 +69,9 @@ class IndexedStringVariable(Variable):
         
         super().__init__(base_layer, uuid if uuid else uuid4())
 
+        # strings are iterated more than once
+        strings = list(strings)
+
         # lexicon of unique strings, sorted by total occurence
         lex = Counter(strings)
         lex = [x[0] for x in lex.most_common()]
@@ -75,11 +82,10 @@ class IndexedStringVariable(Variable):
         lexicon = StringVector(lex, "Lexicon", lsize)
 
         # lexicon hashes
-        hashes = [(fnv1a_64(l), i) for i, l in enumerate(lex)]
+        lexindex = Index.from_arrays(fnv1a_64_strings(lex), np.arange(lsize), "LexHash", lsize)
 
-        lexindex = Index(hashes, "LexHash", lsize)
-
-        lexids = [(lex.index(pos),) for pos in strings]
+        lex_ids = {l: i for i, l in enumerate(lex)}
+        lexids = np.fromiter((lex_ids[s] for s in strings), dtype=np.int64, count=len(strings))
 
         if compressed:
             lexidstream = VectorComp(lexids, "LexIDStream", len(lexids))
@@ -118,13 +124,14 @@ class IntegerVariable(Variable):
 
         # sort index
 
-        pairs = [(n, i) for i, n in enumerate(ints)]
-        pairs.sort(key = lambda x: x[0])
+        # the index sorts by value and then by position
+        ints = np.asarray(ints, dtype=np.int64)
+        cpos = np.arange(len(ints))
 
         if compressed:
-            int_sort = IndexCompressed(pairs, "IntSort", len(ints))
+            int_sort = IndexCompressed.from_arrays(ints, cpos, "IntSort", len(ints))
         else:
-            int_sort = Index(pairs, "IntSort", len(ints))
+            int_sort = Index.from_arrays(ints, cpos, "IntSort", len(ints))
             
 
         self.container = Container(
@@ -153,17 +160,18 @@ class SetVariable(Variable):
         lexicon = StringVector(types.keys(), "Lexicon", v)
         
         # sort index of types
-        types_hash = [(fnv1a_64(t), i) for t, i in types.items()]
+        lexhash = Index.from_arrays(fnv1a_64_strings(list(types)), np.arange(v), "LexHash", v)
 
-        lexhash = Index(types_hash, "LexHash", len(types_hash))
+        # sets of type ids as one flat array, sorted within each set
+        set_lens = np.fromiter((len(s) for s in sets), dtype=np.int64, count=n)
+        set_offsets = np.concatenate(([0], np.cumsum(set_lens)))
+        type_ids = np.fromiter((types[i] for s in sets for i in s), dtype=np.int64, count=set_offsets[-1])
+        type_ids = type_ids[np.lexsort((type_ids, np.repeat(np.arange(n), set_lens)))]
 
-        # sets of type ids
-        id_sets = [ sorted([types[i] for i in s]) for s in sets ]
-        
-        id_set_stream = Set(id_sets, "IDSetStream", n)
+        id_set_stream = Set.from_arrays(type_ids, set_offsets, "IDSetStream", n)
 
         # index of type occurrences in sets, associates types with set IDs/layer positions
-        id_set_index = InvertedIndex(list(types), id_sets, "IDSetIndex", v, 0)
+        id_set_index = InvertedIndex.from_arrays(list(types), type_ids, set_offsets, "IDSetIndex", v, 0)
 
         # partition
         p_vec = Vector(self.base_layer.partition, "Partition", len(self.base_layer.partition))
@@ -1,14 +1,30 @@
 # code lazily transferred from varint_bench.c
 # warning, here be dragons
 
+import numpy as np
+
 def encode_varint(x):
+    # fast paths for the common 1 and 2 byte cases
+    if -64 <= x < 64:
+        return bytearray((~x | 0x40,) if x < 0 else (x,))
+    if -8192 <= x < 8192:
+        m = ~x if x < 0 else x
+        return bytearray((
+            (m >> 7) | 0x80 | (0x40 if x < 0 else 0),
+            m & 0x7F,
+        ))
+
+    # anything beyond int64 would lose its high bits in 9 bytes
+    if not -(1 << 63) <= x < (1 << 63):
+        raise OverflowError(f'{x} does not fit into a 64 bit signed VarInt')
+
     negative = x < 0
     mask = 0xFFFFFFFFFFFFFFFF
     if negative:
         x = ~x
     mask <<= 6
     n_bytes = 1
-    while (x & mask) != 0:
+    while (x & mask) != 0 and n_bytes < 9:
         mask <<= 7
         n_bytes += 1
     
@@ -37,3 +53,111 @@ def encode_varint(x):
     o[0] = byte
 
     return o
+
+
+# smallest magnitude that needs more than 1, 2, ..., 8 bytes
+_VARINT_LIMITS = np.array([1 << (6 + 7*i) for i in range(8)], dtype=np.uint64)
+
+def _magnitudes(a):
+    a = np.asarray(a, dtype=np.int64).ravel()
+    negative = a < 0
+    return np.where(negative, ~a, a).view(np.uint64), negative
+
+
+def _lengths(x, x_max):
+    # after delta coding most values are small, so catch the common cases of
+    # single byte VarInts and of VarInts with at most two bytes early
+    if x_max < _VARINT_LIMITS[0]:
+        return np.ones(len(x), dtype=np.int64)
+    elif x_max < _VARINT_LIMITS[1]:
+        return (x >= _VARINT_LIMITS[0]) + 1
+    return np.searchsorted(_VARINT_LIMITS, x, side='right') + 1
+
+
+def varint_lengths(a):
+    """
+    Computes the encoded length of every integer without encoding it.
+
+    Parameters
+    ----------
+    a : array_like
+        Integers that fit into an int64.
+
+    Returns
+    -------
+    np.ndarray
+        The length in bytes of every VarInt, as returned by
+        encode_varint_array with return_lengths set.
+    """
+
+    x = _magnitudes(a)[0]
+    return _lengths(x, x.max() if len(x) else 0)
+
+
+def encode_varint_array(a, return_lengths=False):
+    """
+    Encodes a whole array of integers as consecutive VarInts.
+
+    Produces the same bytes as calling encode_varint on every element and
+    concatenating the results, but does the work column-wise in NumPy.
+
+    Parameters
+    ----------
+    a : array_like
+        Integers that fit into an int64.
+    return_lengths : bool = False
+        Whether to also return the encoded length of each element.
+
+    Returns
+    -------
+    np.ndarray
+        The encoded VarInts as a flat uint8 array.
+    np.ndarray, optional
+        The length in bytes of every VarInt, only if return_lengths is set.
+    """
+
+    x, negative = _magnitudes(a)
+    x_max = x.max() if len(x) else 0
+
+    # single byte VarInts only need their sign flag
+    if x_max < _VARINT_LIMITS[0]:
+        o = x.astype(np.uint8)
+        o[negative] |= 0x40
+        if return_lengths:
+            return o, np.ones(len(o), dtype=np.int64)
+        return o
+
+    n_bytes = _lengths(x, x_max)
+    ends = np.cumsum(n_bytes)
+    o = np.empty(ends[-1] if len(ends) else 0, dtype=np.uint8)
+
+    # 9 byte VarInts carry a full 8 bits in their last byte
+    nine = n_bytes == 9
+    if nine.any():
+        o[ends[nine] - 1] = x[nine] & 0xFF
+        x[nine] >>= 8
+
+    # trailing 7 bit groups, back to front
+    tail = n_bytes - 1 - nine
+    last = ends - 1 - nine
+    for k in range(7):
+        sel = tail > k
+        if not sel.any():
+            break
+        byte = x[sel] & 0x7F
+        if k > 0:
+            byte |= 0x80
+        else:
+            byte[nine[sel]] |= 0x80
+        o[last[sel] - k] = byte
+        x[sel] >>= 7
+
+    # leading byte with sign flag
+    byte = x & 0x3F
+    byte[n_bytes > 1] |= 0x80
+    byte[negative] |= 0x40
+    o[ends - n_bytes] = byte
+
+    if return_lengths:
+        return o, n_bytes
+    return o